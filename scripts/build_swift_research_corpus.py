@@ -1,10 +1,33 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
+import hashlib
 import json
+import os
 from collections import Counter
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json stays the baseline
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps_line(row: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    # match orjson's compact separators so output does not depend on which encoder ran
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _dumps_pretty(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2)
+    return json.dumps(value, ensure_ascii=False, indent=2).encode('utf-8')
+
 
 ROOT = Path('/Users/avrohom/Downloads/journeyatlas')
 
@@ -14,7 +37,10 @@ MAC_PACK = ROOT / 'macos-app/AtlasMasaMacOS/Sources/Core/AtlasResearchPack.swift
 SCI_TRAINING = ROOT / 'atlas-concierge/kb/training/local_reasoner_training_science.jsonl'
 BASE_TRAINING = ROOT / 'atlas-concierge/kb/training/local_reasoner_training.jsonl'
 REPORT = ROOT / 'docs/ai/swift-scientific-corpus-report.md'
+# rows serialized per handle.write; bounds the joined buffer on large corpora
+JSONL_WRITE_BATCH = 4096
 
+DEFAULT_LABEL = 'travel_design_strategy'
 LABEL_MAP = {
     'wealth': 'travel_design_revenue',
     'travel': 'travel_design_journey_ops',
@@ -57,6 +83,55 @@ LABEL_MAP = {
     'innovation': 'travel_design_tech_innovation',
 }
 
+_NEURO_DOMAINS = frozenset({'travel', 'mobility', 'recovery', 'health', 'wellbeing', 'skill-building', 'motivation'})
+_EMERGENCY_DOMAINS = frozenset({
+    'emergency-response',
+    'emergency-preparedness',
+    'emergency-management',
+    'crisis-management',
+    'crisis-planning',
+    'incident-command',
+})
+_PROBLEM_SOLVING_DOMAINS = frozenset({
+    'human-problem-solving',
+    'human-performance',
+    'biological-performance',
+    'environmental-performance',
+    'problem-solving',
+})
+_INNOVATION_DOMAINS = frozenset({
+    'technology-innovation',
+    'systems-innovation',
+    'digital-innovation',
+    'physical-innovation',
+    'innovation',
+})
+
+_NEURO_BRIEF = (
+    "Travel design neuro brief: use controlled novelty plus structured reflection to improve adaptability "
+    "and protect long-term cognitive vitality."
+)
+_EMERGENCY_BRIEF = (
+    "Emergency command brief: convert this evidence into a triage-stabilize-communicate-escalate protocol "
+    "for immediate field execution."
+)
+_PROBLEM_SOLVING_BRIEF = (
+    "Human problem-solving optimization brief: define biological and environmental conditions that maximize "
+    "cognitive throughput under uncertainty."
+)
+_INNOVATION_BRIEF = (
+    "Innovation systems brief: translate this into a digital+physical prototype loop with safety gates and "
+    "clear validation metrics."
+)
+
+# evaluated in order; a domain can pick up more than one brief
+_DOMAIN_BRIEFS = (
+    (_NEURO_DOMAINS, _NEURO_BRIEF),
+    (_EMERGENCY_DOMAINS, _EMERGENCY_BRIEF),
+    (_PROBLEM_SOLVING_DOMAINS, _PROBLEM_SOLVING_BRIEF),
+    (_INNOVATION_DOMAINS, _INNOVATION_BRIEF),
+)
+
 
 def _normalize_keywords(value):
     if isinstance(value, list):
@@ -67,24 +142,45 @@ def _normalize_keywords(value):
     return []
 
 
+def _stable_paper_id(title: str, year: int) -> str:
+    # stable across PYTHONHASHSEED so ids survive reruns; 64 bits keeps collisions out of reach
+    digest = hashlib.blake2b(f'{title}|{year}'.encode('utf-8'), digest_size=8).hexdigest()
+    return f'paper-{digest}'
+
+
+def _iter_jsonl_lines(path: Path, repaired: Optional[List[int]] = None) -> Iterator[bytes]:
+    # buffered iteration also reads pipes and process substitution, which report st_size 0
+    with path.open('rb') as handle:
+        for line_number, raw in enumerate(handle, start=1):
+            # some corpus dumps join records with a literal "\\n"; only those lines pay for the fixup
+            if b'\\n' in raw:
+                if repaired is not None:
+                    repaired.append(line_number)
+                chunks = raw.replace(b'\\n', b'\n').split(b'\n')
+            else:
+                chunks = (raw,)
+            for chunk in chunks:
+                line = chunk.strip()
+                if line:
+                    yield line
+
+
 def load_jsonl(paths: List[Path]) -> List[Dict]:
-    rows = []
+    # bound once: this runs per paper and a paper_to_label frame costs more than the lookup
+    label_for = LABEL_MAP.get
+    dedup = {}
     for path in paths:
         if not path.exists():
             raise FileNotFoundError(f'missing input corpus file: {path}')
-        normalized_text = path.read_text(encoding='utf-8').replace('\\n', '\n')
-        for raw in normalized_text.splitlines():
-            line = raw.strip()
-            if not line:
-                continue
-            row = json.loads(line)
+        for line in _iter_jsonl_lines(path):
+            row = _loads(line)
             title = str(row.get('title', '')).strip()
             year = int(row.get('year', 0) or 0)
             if not title or year <= 0:
                 continue
 
             normalized = {
-                'id': str(row.get('id') or f"paper-{abs(hash(title + str(year))) % 1_000_000}").strip(),
+                'id': str(row.get('id') or _stable_paper_id(title, year)).strip(),
                 'title': title,
                 'year': year,
                 'domain': str(row.get('domain') or 'execution').strip().lower(),
@@ -102,44 +198,54 @@ def load_jsonl(paths: List[Path]) -> List[Dict]:
                 normalized['source_url'] = 'https://doi.org/'
             if not normalized['keywords']:
                 normalized['keywords'] = [normalized['domain'], 'execution', 'atlas']
-            rows.append(normalized)
+            # underscore fields are build-time only and never reach the Swift packs
+            normalized['_label'] = label_for(normalized['domain'], DEFAULT_LABEL)
+            # the last occurrence of a (title, year) pair wins
+            dedup[(title.lower(), year)] = normalized
 
-    dedup = {}
-    for row in rows:
-        key = (row['title'].lower(), row['year'])
-        dedup[key] = row
     return sorted(dedup.values(), key=lambda r: (-r['year'], r['title']))
 
 
-def to_swift_pack(rows: List[Dict], output: Path):
-    payload = json.dumps(rows, ensure_ascii=False, indent=2)
-    content = f'''import Foundation
+def _public_fields(row: Dict) -> Dict:
+    return {k: v for k, v in row.items() if not k.startswith('_')}
 
-enum AtlasResearchPack {{
-    static func load() -> [AtlasResearchPaper] {{
-        guard let data = atlasResearchPackJSON.data(using: .utf8) else {{
+
+_SWIFT_PACK_HEADER = b'''import Foundation
+
+enum AtlasResearchPack {
+    static func load() -> [AtlasResearchPaper] {
+        guard let data = atlasResearchPackJSON.data(using: .utf8) else {
             return []
-        }}
+        }
         return (try? JSONDecoder().decode([AtlasResearchPaper].self, from: data)) ?? []
-    }}
-}}
+    }
+}
 
 private let atlasResearchPackJSON = #"""
-{payload}
+'''
+_SWIFT_PACK_FOOTER = b'''
 """#
 '''
+
+
+def _build_swift_pack(rows: List[Dict]) -> bytes:
+    payload = _dumps_pretty([_public_fields(row) for row in rows])
+    return _SWIFT_PACK_HEADER + payload + _SWIFT_PACK_FOOTER
+
+
+def _write_swift_pack(content: bytes, output: Path):
     output.parent.mkdir(parents=True, exist_ok=True)
-    output.write_text(content, encoding='utf-8')
+    output.write_bytes(content)
 
 
 def paper_to_label(domain: str) -> str:
-    return LABEL_MAP.get(domain, 'travel_design_strategy')
+    return LABEL_MAP.get(domain, DEFAULT_LABEL)
 
 
 def build_training_rows(rows: List[Dict]) -> List[Dict]:
     training_rows = []
     for row in rows:
-        label = paper_to_label(row['domain'])
+        label = row['_label']
         title = row['title']
         domain = row['domain']
         insight = row['actionable_insight']
@@ -150,45 +256,7 @@ def build_training_rows(rows: List[Dict]) -> List[Dict]:
             f"Research-backed travel design execution request: {insight}",
             f"Translate this scientific finding into Atlas travel design workflow now: {action}",
         ]
-        if domain in {'travel', 'mobility', 'recovery', 'health', 'wellbeing', 'skill-building', 'motivation'}:
-            prompts.append(
-                "Travel design neuro brief: use controlled novelty plus structured reflection to improve adaptability "
-                "and protect long-term cognitive vitality."
-            )
-        if domain in {
-            'emergency-response',
-            'emergency-preparedness',
-            'emergency-management',
-            'crisis-management',
-            'crisis-planning',
-            'incident-command',
-        }:
-            prompts.append(
-                "Emergency command brief: convert this evidence into a triage-stabilize-communicate-escalate protocol "
-                "for immediate field execution."
-            )
-        if domain in {
-            'human-problem-solving',
-            'human-performance',
-            'biological-performance',
-            'environmental-performance',
-            'problem-solving',
-        }:
-            prompts.append(
-                "Human problem-solving optimization brief: define biological and environmental conditions that maximize "
-                "cognitive throughput under uncertainty."
-            )
-        if domain in {
-            'technology-innovation',
-            'systems-innovation',
-            'digital-innovation',
-            'physical-innovation',
-            'innovation',
-        }:
-            prompts.append(
-                "Innovation systems brief: translate this into a digital+physical prototype loop with safety gates and "
-                "clear validation metrics."
-            )
+        prompts.extend(brief for domains, brief in _DOMAIN_BRIEFS if domain in domains)
         for prompt in prompts:
             training_rows.append({
                 'prompt': prompt,
@@ -200,54 +268,89 @@ def build_training_rows(rows: List[Dict]) -> List[Dict]:
     return training_rows
 
 
+def _write_rows(handle, rows: List[Dict]):
+    for start in range(0, len(rows), JSONL_WRITE_BATCH):
+        handle.write(b''.join(_dumps_line(row) for row in rows[start:start + JSONL_WRITE_BATCH]))
+
+
 def write_jsonl(rows: List[Dict], output: Path):
     output.parent.mkdir(parents=True, exist_ok=True)
-    with output.open('w', encoding='utf-8') as handle:
-        for row in rows:
-            handle.write(json.dumps(row, ensure_ascii=False) + '\n')
+    with output.open('wb') as handle:
+        _write_rows(handle, rows)
+
+
+def append_jsonl(rows: List[Dict], output: Path):
+    with output.open('r+b') as handle:
+        end = handle.seek(0, os.SEEK_END)
+        if end:
+            handle.seek(end - 1)
+            # never glue the first appended row onto an unterminated last line
+            if handle.read(1) != b'\n':
+                handle.write(b'\n')
+        _write_rows(handle, rows)
+
+
+def _prompt_key(prompt) -> str:
+    return str(prompt).strip().lower()
 
 
 def merge_into_base(base: Path, generated_rows: List[Dict]):
     existing = []
+    repaired = []
     if base.exists():
-        normalized_text = base.read_text(encoding='utf-8').replace('\\n', '\n')
-        for raw in normalized_text.splitlines():
-            line = raw.strip()
-            if line:
-                existing.append(json.loads(line))
+        for line in _iter_jsonl_lines(base, repaired):
+            existing.append(_loads(line))
 
     prompt_to_index = {}
     for idx, row in enumerate(existing):
-        prompt = str(row.get('prompt', '')).strip().lower()
+        prompt = _prompt_key(row.get('prompt', ''))
         if prompt:
             prompt_to_index[prompt] = idx
 
-    merged = list(existing)
-    added = 0
-    updated = 0
+    # partition first so brand-new prompts skip the field comparisons entirely
+    new_rows = {}
+    updates = []
     for row in generated_rows:
-        key = row['prompt'].strip().lower()
-        if key in prompt_to_index:
-            idx = prompt_to_index[key]
-            changed = False
-            if merged[idx].get('label') != row['label']:
-                merged[idx]['label'] = row['label']
-                changed = True
-            if merged[idx].get('next_action') != row['next_action']:
-                merged[idx]['next_action'] = row['next_action']
-                changed = True
-            if changed:
-                updated += 1
+        key = _prompt_key(row['prompt'])
+        if key in prompt_to_index or key in new_rows:
+            updates.append((key, row))
             continue
-        merged.append({
+        new_rows[key] = {
             'prompt': row['prompt'],
             'label': row['label'],
             'next_action': row['next_action'],
-        })
-        prompt_to_index[key] = len(merged) - 1
-        added += 1
-
-    write_jsonl(merged, base)
+        }
+
+    existing_count = len(existing)
+    merged = existing
+    prompt_to_index.update({key: idx for idx, key in enumerate(new_rows, start=existing_count)})
+    merged.extend(new_rows.values())
+    added = len(new_rows)
+
+    # shared brief prompts come from several papers and overwrite each other within a batch,
+    # so only an existing row's final values against its pre-merge values count as an update
+    before = {}
+    for key, row in updates:
+        idx = prompt_to_index[key]
+        target = merged[idx]
+        if target.get('label') != row['label'] or target.get('next_action') != row['next_action']:
+            # snapshot on the first mismatch only, so identical reruns never build one
+            if idx < existing_count and idx not in before:
+                before[idx] = (target.get('label'), target.get('next_action'))
+            target['label'] = row['label']
+            target['next_action'] = row['next_action']
+    updated = sum(
+        1 for idx, values in before.items()
+        if (merged[idx].get('label'), merged[idx].get('next_action')) != values
+    )
+
+    # pure additions to an already clean file only need their own bytes appended;
+    # updates or literal-"\\n" repairs still rewrite so the trainer sees one record per line
+    if base.exists() and not updated and not repaired:
+        if new_rows:
+            append_jsonl(list(new_rows.values()), base)
+    else:
+        write_jsonl(merged, base)
     return added, updated, len(merged)
 
 
@@ -259,8 +362,11 @@ def write_report(
     merged_total: int,
 ):
     ts = dt.datetime.now(dt.timezone.utc).isoformat()
-    by_domain = Counter([r['domain'] for r in rows])
-    by_label = Counter([paper_to_label(r['domain']) for r in rows])
+    by_domain = Counter()
+    by_label = Counter()
+    for r in rows:
+        by_domain[r['domain']] += 1
+        by_label[r['_label']] += 1
 
     report = [
         '# Swift Scientific Corpus Build Report',
@@ -324,8 +430,10 @@ def main():
     papers = load_jsonl(inputs)
     papers = papers[: max(1, args.max_papers)]
 
-    to_swift_pack(papers, IOS_PACK)
-    to_swift_pack(papers, MAC_PACK)
+    # iOS and macOS ship the same pack, so serialize once
+    swift_pack = _build_swift_pack(papers)
+    _write_swift_pack(swift_pack, IOS_PACK)
+    _write_swift_pack(swift_pack, MAC_PACK)
 
     training_rows = build_training_rows(papers)
     write_jsonl(training_rows, SCI_TRAINING)
@@ -1,14 +1,29 @@
 #!/usr/bin/env python3
 import argparse
+import http.client
 import json
+import threading
 import time
+import urllib.error
 import urllib.parse
-import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
 ROOT = Path('/Users/avrohom/Downloads/journeyatlas')
 DEFAULT_OUT = ROOT / 'atlas-concierge/kb/training/scientific_papers_openalex.jsonl'
 DEFAULT_QUERY_FILE = ROOT / 'atlas-concierge/kb/training/openalex_atlas_queries.txt'
+REQUEST_HEADERS = {'User-Agent': 'atlas-corpus-builder/1.0', 'Connection': 'keep-alive'}
+# OpenAlex polite-pool guidance; --workers is clamped to this
+MAX_WORKERS = 4
+JSONL_WRITE_BATCH = 4096
 
 DEFAULT_QUERIES = [
     'goal setting performance',
@@ -24,39 +39,145 @@ DEFAULT_QUERIES = [
 ]
 
 
+# checked in priority order: a query hitting several groups maps to the first one
+_DOMAIN_KEYWORDS = (
+    ('wealth', ('financial', 'savings', 'revenue', 'wealth')),
+    ('travel', ('transport', 'mobility', 'driving', 'travel')),
+    ('resilience', ('stress', 'resilience', 'trauma', 'safety')),
+    ('recovery', ('sleep', 'recovery', 'wellbeing', 'health')),
+    ('execution', ('time management', 'productivity', 'habit', 'goal', 'implementation')),
+)
+
+
+def _dumps_line(row) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _write_rows(handle, rows):
+    for start in range(0, len(rows), JSONL_WRITE_BATCH):
+        handle.write(b''.join(_dumps_line(row) for row in rows[start:start + JSONL_WRITE_BATCH]))
+
+
+def _sorted_index_text(placed):
+    ordered = sorted(
+        ((idx, token) for token, indexes in placed for idx in indexes if isinstance(idx, int)),
+        key=lambda x: x[0],
+    )
+    return ' '.join(token for _, token in ordered)
+
+
 def inverted_index_to_text(inv):
     if not isinstance(inv, dict):
         return ''
-    positions = []
-    for token, indexes in inv.items():
-        if not isinstance(indexes, list):
-            continue
+    placed = [(token, indexes) for token, indexes in inv.items() if isinstance(indexes, list)]
+    positions = [idx for _, indexes in placed for idx in indexes if isinstance(idx, int)]
+    max_pos = max(positions, default=-1)
+    if max_pos > 4 * len(positions) or min(positions, default=0) < 0:
+        # sparse or negative positions from the API: don't size a slot list from them
+        return _sorted_index_text(placed)
+    # positions densely cover 0..max_pos, so placing tokens into slots replaces the sort
+    slots = [None] * (max_pos + 1)
+    for token, indexes in placed:
         for idx in indexes:
             if isinstance(idx, int):
-                positions.append((idx, token))
-    positions.sort(key=lambda x: x[0])
-    return ' '.join(token for _, token in positions)
+                if slots[idx] is not None:
+                    # a repeated position keeps every token, in sort order, like the sparse path
+                    return _sorted_index_text(placed)
+                slots[idx] = token
+    return ' '.join(token for token in slots if token is not None)
 
 
 def domain_from_query(query: str) -> str:
     q = query.lower()
-    if any(k in q for k in ['financial', 'savings', 'revenue', 'wealth']):
-        return 'wealth'
-    if any(k in q for k in ['transport', 'mobility', 'driving', 'travel']):
-        return 'travel'
-    if any(k in q for k in ['stress', 'resilience', 'trauma', 'safety']):
-        return 'resilience'
-    if any(k in q for k in ['sleep', 'recovery', 'wellbeing', 'health']):
-        return 'recovery'
-    if any(k in q for k in ['time management', 'productivity', 'habit', 'goal', 'implementation']):
-        return 'execution'
+    for domain, keywords in _DOMAIN_KEYWORDS:
+        if any(k in q for k in keywords):
+            return domain
     return 'planning'
 
 
+# one persistent connection per (scheme, host) and worker thread so paging does not redo TCP+TLS per request
+_CONNECTIONS = threading.local()
+
+
+def _connection(scheme: str, netloc: str):
+    pool = getattr(_CONNECTIONS, 'pool', None)
+    if pool is None:
+        pool = _CONNECTIONS.pool = {}
+    key = (scheme, netloc)
+    conn = pool.get(key)
+    if conn is None:
+        conn_cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        conn = conn_cls(netloc, timeout=30)
+        pool[key] = conn
+    return conn
+
+
 def fetch_json(url: str):
-    req = urllib.request.Request(url, headers={'User-Agent': 'atlas-corpus-builder/1.0'})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode('utf-8'))
+    parts = urllib.parse.urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    conn = _connection(parts.scheme, parts.netloc)
+    for attempt in range(2):
+        try:
+            conn.request('GET', target, headers=REQUEST_HEADERS)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (ConnectionError, http.client.BadStatusLine):
+            # the server may drop an idle keep-alive socket; http.client reconnects after close()
+            conn.close()
+            if attempt:
+                raise
+            continue
+        except Exception:
+            # never reuse a socket left mid-response (e.g. after a read timeout)
+            conn.close()
+            raise
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+        return _loads(body)
+
+
+def iter_page_payloads(jobs, workers: int, delay: float, exhausted):
+    # Yields (query, domain, page, payload, error) in job order while keeping at most
+    # `workers` requests in flight. Queries added to `exhausted` by the caller stop
+    # being submitted and any of their in-flight pages are dropped.
+    # `delay` is one minimum gap between request starts shared by all workers, so
+    # adding workers overlaps latency without raising the request rate past 1/delay
+    pace_lock = threading.Lock()
+    next_start = [time.monotonic()]
+
+    def fetch_paced(url: str):
+        with pace_lock:
+            start = max(next_start[0], time.monotonic())
+            next_start[0] = start + delay
+        time.sleep(max(0.0, start - time.monotonic()))
+        return fetch_json(url)
+
+    pending = deque(jobs)
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < workers:
+                    query, domain, page, url = pending.popleft()
+                    if query not in exhausted:
+                        in_flight.append((query, domain, page, pool.submit(fetch_paced, url)))
+                if not in_flight:
+                    break
+                query, domain, page, future = in_flight.popleft()
+                if query in exhausted:
+                    future.cancel()
+                    continue
+                try:
+                    yield query, domain, page, future.result(), None
+                except Exception as exc:
+                    yield query, domain, page, None, exc
+        finally:
+            for *_, future in in_flight:
+                future.cancel()
 
 
 def read_query_file(path: Path):
@@ -89,8 +210,19 @@ def best_source_url(work):
 def build_actionable_insight(abstract: str, domain: str):
     if not abstract:
         return f'Research in {domain} indicates measurable behavior and performance effects under real constraints.'
-    parts = [p.strip() for p in abstract.split('. ') if p.strip()]
-    joined = '. '.join(parts[:2]).strip()
+    # walk '. ' boundaries only until two non-blank sentences are found instead of splitting
+    # the whole abstract; blank segments from stray '.' tokens are skipped as split() did
+    parts = []
+    start = 0
+    while len(parts) < 2:
+        end = abstract.find('. ', start)
+        part = (abstract[start:] if end < 0 else abstract[start:end]).strip()
+        if part:
+            parts.append(part)
+        if end < 0:
+            break
+        start = end + 2
+    joined = '. '.join(parts)
     if len(joined) < 30:
         return f'Research in {domain} indicates measurable behavior and performance effects under real constraints.'
     if len(joined) > 320:
@@ -108,7 +240,8 @@ def main():
     parser.add_argument('--max-papers', type=int, default=25000, help='Hard cap on total papers')
     parser.add_argument('--mailto', default='', help='Contact email for polite pool')
     parser.add_argument('--output', default=str(DEFAULT_OUT), help='Output JSONL path')
-    parser.add_argument('--sleep-ms', type=int, default=200, help='Delay between requests')
+    parser.add_argument('--sleep-ms', type=int, default=200, help='Minimum delay between request starts, shared across workers')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help=f'Concurrent requests (1-{MAX_WORKERS})')
     parser.add_argument('--verbose', action='store_true')
     args = parser.parse_args()
 
@@ -134,7 +267,7 @@ def main():
     output = Path(args.output).expanduser().resolve()
     output.parent.mkdir(parents=True, exist_ok=True)
 
-    dedup = {}
+    jobs = []
     for query in queries:
         domain = domain_from_query(query)
         for page in range(1, max(1, args.pages) + 1):
@@ -147,66 +280,67 @@ def main():
             if args.mailto:
                 params['mailto'] = args.mailto
             url = 'https://api.openalex.org/works?' + urllib.parse.urlencode(params)
-            try:
-                payload = fetch_json(url)
-            except Exception as exc:
-                print(f'warn query={query!r} page={page}: {exc}')
-                continue
+            jobs.append((query, domain, page, url))
 
-            results = payload.get('results', [])
-            if not results:
-                break
+    workers = min(max(1, args.workers), MAX_WORKERS)
+    delay = max(0, args.sleep_ms) / 1000.0
+    exhausted = set()
+    dedup = {}
+    for query, domain, page, payload, exc in iter_page_payloads(jobs, workers, delay, exhausted):
+        if exc is not None:
+            print(f'warn query={query!r} page={page}: {exc}')
+            continue
 
-            if args.verbose:
-                print(f'query={query!r} page={page} results={len(results)}')
+        results = payload.get('results', [])
+        if not results:
+            exhausted.add(query)
+            continue
 
-            for work in results:
-                wid = str(work.get('id') or '').strip()
-                title = str(work.get('display_name') or '').strip()
-                year = int(work.get('publication_year') or 0)
-                if not wid or not title or year < args.from_year:
-                    continue
+        if args.verbose:
+            print(f'query={query!r} page={page} results={len(results)}')
 
-                abstract = inverted_index_to_text(work.get('abstract_inverted_index'))
-                if not abstract:
-                    continue
+        for work in results:
+            wid = str(work.get('id') or '').strip()
+            title = str(work.get('display_name') or '').strip()
+            year = int(work.get('publication_year') or 0)
+            if not wid or not title or year < args.from_year:
+                continue
 
-                keywords = []
-                for concept in (work.get('concepts') or [])[:8]:
-                    name = str(concept.get('display_name') or '').strip().lower()
-                    if name:
-                        keywords.append(name)
-
-                source_url = best_source_url(work)
-                actionable_insight = build_actionable_insight(abstract, domain)
-
-                action_hint = f'Apply one {domain} action today and verify outcome with a checkpoint.'
-
-                row = {
-                    'id': wid.rsplit('/', 1)[-1].lower(),
-                    'title': title,
-                    'year': year,
-                    'domain': domain,
-                    'actionable_insight': actionable_insight,
-                    'action_hint': action_hint,
-                    'source_url': source_url,
-                    'keywords': sorted(set(keywords))[:12],
-                }
-                dedup[(title.lower(), year)] = row
-                if len(dedup) >= args.max_papers:
-                    break
+            abstract = inverted_index_to_text(work.get('abstract_inverted_index'))
+            if not abstract:
+                continue
 
+            keywords = []
+            for concept in (work.get('concepts') or [])[:8]:
+                name = str(concept.get('display_name') or '').strip().lower()
+                if name:
+                    keywords.append(name)
+
+            source_url = best_source_url(work)
+            actionable_insight = build_actionable_insight(abstract, domain)
+
+            action_hint = f'Apply one {domain} action today and verify outcome with a checkpoint.'
+
+            row = {
+                'id': wid.rsplit('/', 1)[-1].lower(),
+                'title': title,
+                'year': year,
+                'domain': domain,
+                'actionable_insight': actionable_insight,
+                'action_hint': action_hint,
+                'source_url': source_url,
+                'keywords': sorted(set(keywords))[:12],
+            }
+            dedup[(title.lower(), year)] = row
             if len(dedup) >= args.max_papers:
                 break
 
-            time.sleep(max(0, args.sleep_ms) / 1000.0)
         if len(dedup) >= args.max_papers:
             break
 
     rows = sorted(dedup.values(), key=lambda r: (-r['year'], r['title']))
-    with output.open('w', encoding='utf-8') as handle:
-        for row in rows:
-            handle.write(json.dumps(row, ensure_ascii=False) + '\n')
+    with output.open('wb') as handle:
+        _write_rows(handle, rows)
 
     print(f'queries={len(queries)}')
     print(f'papers={len(rows)}')
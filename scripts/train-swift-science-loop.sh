@@ -17,6 +17,7 @@ OPENALEX_MAX_PAPERS="${OPENALEX_MAX_PAPERS:-25000}"
 OPENALEX_FROM_YEAR="${OPENALEX_FROM_YEAR:-1990}"
 OPENALEX_MAILTO="${OPENALEX_MAILTO:-}"
 OPENALEX_SLEEP_MS="${OPENALEX_SLEEP_MS:-180}"
+OPENALEX_WORKERS="${OPENALEX_WORKERS:-4}"
 MAX_VOCAB="${MAX_VOCAB:-1400}"
 PRUNE_TARGET_VOCAB="${PRUNE_TARGET_VOCAB:-512}"
 MIN_TOKEN_FREQ="${MIN_TOKEN_FREQ:-1}"
@@ -34,6 +35,7 @@ run_once() {
       --from-year "$OPENALEX_FROM_YEAR"
       --max-papers "$OPENALEX_MAX_PAPERS"
       --sleep-ms "$OPENALEX_SLEEP_MS"
+      --workers "$OPENALEX_WORKERS"
       --output "$EXTRA_INPUT_CORPUS"
     )
     if [[ -n "$OPENALEX_MAILTO" ]]; then
@@ -0,0 +1,77 @@
+import importlib.util
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO = Path(__file__).resolve().parents[1]
+SEED = REPO / 'atlas-concierge/kb/training/scientific_papers_seed.jsonl'
+BASE = REPO / 'atlas-concierge/kb/training/local_reasoner_training.jsonl'
+
+_spec = importlib.util.spec_from_file_location('build_swift_research_corpus', REPO / 'scripts/build_swift_research_corpus.py')
+corpus = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(corpus)
+
+
+class MergeIntoBaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.base = Path(self.tmp.name) / 'base.jsonl'
+        papers = corpus.load_jsonl([SEED])
+        self.generated = corpus.build_training_rows(papers)
+
+    def _seed_base(self):
+        # only the hand-written rows, so the first merge has to add the science rows
+        generated = {corpus._prompt_key(row['prompt']) for row in self.generated}
+        lines = [
+            line for line in BASE.read_text(encoding='utf-8').splitlines()
+            if line.strip() and corpus._prompt_key(corpus._loads(line).get('prompt', '')) not in generated
+        ]
+        self.base.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    def test_identical_rerun_neither_appends_nor_rewrites(self):
+        self._seed_base()
+        added, updated, total = corpus.merge_into_base(self.base, self.generated)
+        self.assertGreater(added, 0)
+        self.assertEqual(updated, 0)
+        first = self.base.read_bytes()
+
+        with mock.patch.object(corpus, 'write_jsonl') as rewrite, mock.patch.object(corpus, 'append_jsonl') as append:
+            rerun = corpus.merge_into_base(self.base, self.generated)
+        rewrite.assert_not_called()
+        append.assert_not_called()
+        self.assertEqual(rerun, (0, 0, total))
+        self.assertEqual(self.base.read_bytes(), first)
+
+    def test_changed_existing_row_rewrites(self):
+        self._seed_base()
+        corpus.merge_into_base(self.base, self.generated)
+        changed = [dict(row) for row in self.generated]
+        changed[0]['next_action'] = 'Something new.'
+        with mock.patch.object(corpus, 'write_jsonl', wraps=corpus.write_jsonl) as rewrite:
+            added, updated, _ = corpus.merge_into_base(self.base, changed)
+        rewrite.assert_called_once()
+        self.assertEqual((added, updated), (0, 1))
+
+
+class LoadJsonlTest(unittest.TestCase):
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'needs named pipes')
+    def test_reads_from_a_pipe(self):
+        # pipes and process substitution report st_size 0 but still carry rows
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        fifo = Path(tmp.name) / 'seed.fifo'
+        os.mkfifo(fifo)
+        writer = threading.Thread(target=lambda: fifo.write_bytes(SEED.read_bytes()))
+        writer.start()
+        papers = corpus.load_jsonl([fifo])
+        writer.join()
+        self.assertEqual(len(papers), len(corpus.load_jsonl([SEED])))
+        self.assertGreater(len(papers), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import importlib.util
+import unittest
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+
+_spec = importlib.util.spec_from_file_location('fetch_openalex_atlas_papers', REPO / 'scripts/fetch_openalex_atlas_papers.py')
+fetch = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fetch)
+
+
+class InvertedIndexToTextTest(unittest.TestCase):
+    def test_dense_index_reads_in_position_order(self):
+        self.assertEqual(fetch.inverted_index_to_text({'b': [1], 'a': [0, 2]}), 'a b a')
+
+    def test_repeated_position_keeps_every_token(self):
+        self.assertEqual(fetch.inverted_index_to_text({'a': [0], 'b': [0]}), 'a b')
+
+    def test_negative_position_is_kept(self):
+        self.assertEqual(fetch.inverted_index_to_text({'a': [-1, 0, 1], 'b': [2]}), 'a a a b')
+
+
+class BuildActionableInsightTest(unittest.TestCase):
+    def test_standalone_period_token_is_dropped(self):
+        abstract = 'Long words about alpha gamma . Alpha beta. More text follows here.'
+        self.assertEqual(fetch.build_actionable_insight(abstract, 'travel'), 'Long words about alpha gamma. Alpha beta')
+
+    def test_leading_period_does_not_fall_back(self):
+        abstract = '. Longer phrase here. Gamma delta epsilon. Zeta.'
+        self.assertEqual(fetch.build_actionable_insight(abstract, 'travel'), 'Longer phrase here. Gamma delta epsilon')
+
+
+if __name__ == '__main__':
+    unittest.main()